@@ -1,6 +1,15 @@
+import html
+import sqlite3
+import threading
+import time
 import streamlit as st
+import httpx
+import orjson
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, wait
+from selectolax.lexbor import LexborHTMLParser
 from duckduckgo_search import DDGS
 
 # Configure Streamlit page
@@ -14,6 +23,65 @@ st.set_page_config(
 ART_INSTITUTE_API = "https://api.artic.edu/api/v1/"
 PLACEHOLDER_IMAGE = "https://via.placeholder.com/300x400.png?text=No+Image+Available"
 ARTWORKS_PER_PAGE = 5  # Number of artworks to load per page
+MAX_PAGE_BYTES = 256_000  # Cap on bytes downloaded per research page
+WEB_CACHE_PATH = "art_cache.sqlite"  # On-disk cache for fetched research pages
+WEB_CACHE_TTL = 86400  # Seconds a cached research page stays fresh
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3'
+
+
+@st.cache_resource
+def get_api_client():
+    """Shared HTTP/2 client so concurrent API calls multiplex over one connection"""
+    return httpx.Client(
+        headers={'User-Agent': USER_AGENT},
+        timeout=10,
+        transport=httpx.HTTPTransport(http2=True, retries=2)
+    )
+
+
+@st.cache_resource
+def get_http_session():
+    """Shared HTTP session for web research so connections are kept alive across reruns"""
+    session = requests.Session()
+    session.headers.update({'User-Agent': USER_AGENT})
+    session.mount('https://', HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=20,
+        max_retries=Retry(total=2, backoff_factor=0.2)
+    ))
+    return session
+
+
+@st.cache_resource
+def get_page_cache():
+    """On-disk cache of research pages, trimmed to MAX_PAGE_BYTES and keyed by URL"""
+    connection = sqlite3.connect(WEB_CACHE_PATH, check_same_thread=False, isolation_level=None)
+    connection.execute("CREATE TABLE IF NOT EXISTS pages (url TEXT PRIMARY KEY, body BLOB, expires REAL)")
+    connection.execute("CREATE INDEX IF NOT EXISTS pages_expires ON pages (expires)")
+    connection.execute("DELETE FROM pages WHERE expires <= ?", (time.time(),))
+    return connection, threading.Lock()
+
+
+API_CLIENT = get_api_client()
+SESSION = get_http_session()
+PAGE_CACHE, PAGE_CACHE_LOCK = get_page_cache()
+
+
+@st.cache_resource
+def get_executor():
+    """Shared thread pool for background prefetching"""
+    return ThreadPoolExecutor(max_workers=4)
+
+
+@st.cache_resource
+def get_request_executor():
+    """Shared thread pool for user-initiated work, so it never queues behind prefetches"""
+    return ThreadPoolExecutor(max_workers=8)
+
+
+EXECUTOR = get_executor()
+REQUEST_EXECUTOR = get_request_executor()
+
 
 # Session State Initialization
 if 'selected_artist' not in st.session_state:
@@ -22,32 +90,50 @@ if 'selected_artwork' not in st.session_state:
     st.session_state.selected_artwork = None
 if 'web_context' not in st.session_state:
     st.session_state.web_context = []
+if 'research_error' not in st.session_state:
+    st.session_state.research_error = None
 if 'artworks_list' not in st.session_state:
     st.session_state.artworks_list = []
 if 'artworks_current_page' not in st.session_state:
     st.session_state.artworks_current_page = 1
 if 'has_more_artworks' not in st.session_state:
     st.session_state.has_more_artworks = True
+if 'artworks_future' not in st.session_state:
+    st.session_state.artworks_future = None
+if 'next_page_future' not in st.session_state:
+    st.session_state.next_page_future = None
+if 'detail_futures' not in st.session_state:
+    st.session_state.detail_futures = {}
+if 'example_artists' not in st.session_state:
+    st.session_state.example_artists = None
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def fetch_api(endpoint, params, timeout=10):
+    """Fetch JSON from the API, cached across reruns (failed requests raise and are not cached)"""
+    response = API_CLIENT.get(f"{ART_INSTITUTE_API}{endpoint}", params=params, timeout=timeout)
+    response.raise_for_status()
+    try:
+        return orjson.loads(response.content)
+    except orjson.JSONDecodeError as e:
+        # Surface non-JSON bodies (e.g. CDN error pages) as the HTTP errors callers already handle
+        raise httpx.DecodingError(f"Invalid JSON from API: {str(e)}", request=response.request) from e
 
 
 def get_artist_details(artist_id):
     """Get detailed artist information from API"""
     try:
-        response = requests.get(
-            f"{ART_INSTITUTE_API}artists/{artist_id}",
-            params={'fields': 'id,title,birth_date,death_date,description'},
-            timeout=10
-        )
-        response.raise_for_status()
-        data = response.json().get('data', {})
+        data = fetch_api(
+            f"artists/{artist_id}",
+            params={'fields': 'id,title,birth_date,death_date'}
+        ).get('data', {})
         return {
             'id': data.get('id', artist_id),
             'title': data.get('title', 'Unknown Artist'),
             'birth_date': data.get('birth_date', 'Unknown'),
-            'death_date': data.get('death_date', 'Unknown'),
-            'description': data.get('description', 'No description available')
+            'death_date': data.get('death_date', 'Unknown')
         }
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         st.error(f"Error fetching artist details: {str(e)}")
         return {'id': artist_id, 'title': 'Unknown Artist'}
 
@@ -55,14 +141,12 @@ def get_artist_details(artist_id):
 def search_artists(query):
     """Search artists using API"""
     try:
-        response = requests.get(
-            f"{ART_INSTITUTE_API}artists/search",
-            params={'q': query, 'limit': 10, 'fields': 'id,title'},
-            timeout=10
+        data = fetch_api(
+            "artists/search",
+            params={'q': query, 'limit': 10, 'fields': 'id,title'}
         )
-        response.raise_for_status()
-        return response.json().get('data', [])
-    except requests.RequestException as e:
+        return data.get('data', [])
+    except httpx.HTTPError as e:
         st.error(f"Error searching artists: {str(e)}")
         return []
 
@@ -70,108 +154,154 @@ def search_artists(query):
 def get_random_artists():
     """Fetch random artist examples from API"""
     try:
-        response = requests.get(
-            f"{ART_INSTITUTE_API}artists",
+        data = fetch_api(
+            "artists",
             params={'limit': 5, 'fields': 'id,title'},
             timeout=5
         )
-        response.raise_for_status()
-        return response.json().get('data', [])
-    except requests.RequestException as e:
+        return data.get('data', [])
+    except httpx.HTTPError as e:
         st.error(f"Error fetching random artists: {str(e)}")
         return []
 
 
-def get_artist_artworks(artist_id, page=1):
-    """Get artworks for a specific artist with pagination"""
-    try:
-        response = requests.get(
-            f"{ART_INSTITUTE_API}artworks/search",
-            params={
-                'query[term][artist_id]': artist_id,
-                'limit': ARTWORKS_PER_PAGE,
-                'page': page,
-                'fields': 'id,title,image_id,date_display'
-            },
-            timeout=10
-        )
-        response.raise_for_status()
-        data = response.json()
-        return {
-            'artworks': data.get('data', []),
-            'pagination': data.get('pagination', {})
+def fetch_artist_artworks(artist_id, page=1):
+    """Get artworks for a specific artist with pagination (API errors raise to the caller)"""
+    data = fetch_api(
+        "artworks/search",
+        params={
+            'query[term][artist_id]': artist_id,
+            'limit': ARTWORKS_PER_PAGE,
+            'page': page,
+            'fields': 'id,title,image_id'
         }
-    except requests.RequestException as e:
-        st.error(f"Error fetching artist artworks: {str(e)}")
-        return {'artworks': [], 'pagination': {}}
+    )
+    return {
+        'artworks': data.get('data', []),
+        'pagination': data.get('pagination', {})
+    }
+
+
+def fetch_artwork_details(artwork_id):
+    """Get detailed artwork information from API (API errors raise, for background use)"""
+    data = fetch_api(
+        f"artworks/{artwork_id}",
+        params={'fields': 'title,artist_title,date_display,medium_display,dimensions,image_id,style_titles'}
+    ).get('data', {})
+    return {
+        'id': data.get('id', artwork_id),
+        'title': data.get('title', 'Untitled'),
+        'artist_title': data.get('artist_title', 'Unknown'),
+        'date_display': data.get('date_display', 'Unknown date'),
+        'medium_display': data.get('medium_display', 'Unknown medium'),
+        'dimensions': data.get('dimensions', 'N/A'),
+        'image_id': data.get('image_id'),
+        'style_titles': data.get('style_titles', [])
+    }
 
 
 def get_artwork_details(artwork_id):
     """Get detailed artwork information from API"""
     try:
-        response = requests.get(
-            f"{ART_INSTITUTE_API}artworks/{artwork_id}",
-            params={'fields': 'title,artist_title,date_display,medium_display,dimensions,image_id,style_titles'},
-            timeout=10
-        )
-        response.raise_for_status()
-        data = response.json().get('data', {})
-        return {
-            'id': data.get('id', artwork_id),
-            'title': data.get('title', 'Untitled'),
-            'artist_title': data.get('artist_title', 'Unknown'),
-            'date_display': data.get('date_display', 'Unknown date'),
-            'medium_display': data.get('medium_display', 'Unknown medium'),
-            'dimensions': data.get('dimensions', 'N/A'),
-            'image_id': data.get('image_id'),
-            'style_titles': data.get('style_titles', [])
-        }
-    except requests.RequestException as e:
+        return fetch_artwork_details(artwork_id)
+    except httpx.HTTPError as e:
         st.error(f"Error fetching artwork details: {str(e)}")
         return {}
 
 
-def web_research_artwork(artwork_title, artist_name):
-    """Enhanced web research for artwork context"""
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3'
-    }
-
-    try:
-        with DDGS() as ddgs:
-            search_results = list(ddgs.text(
+@st.cache_data(ttl=86400, show_spinner=False)
+def search_artwork_sources(artwork_title, artist_name):
+    """Search the web for artwork sources, cached separately from the page contents"""
+    with DDGS() as ddgs:
+        return [
+            result['href'] for result in ddgs.text(
                 f"{artwork_title} {artist_name} art historical context analysis",
                 max_results=3
-            ))
-
-        context = []
-        for result in search_results:
-            try:
-                page = requests.get(result['href'], timeout=10, headers=headers)
-                soup = BeautifulSoup(page.content, 'html.parser')
-
-                # Clean up page content
-                for element in soup(['script', 'style', 'nav', 'footer', 'header', 'iframe']):
-                    element.decompose()
-
-                content = soup.get_text(separator='\n', strip=True)
-                context.append({
-                    'source': result['href'],
-                    'content': content[:1500]  # More conservative length limit
-                })
-            except Exception as e:
-                continue
-        return context
-    except Exception as e:
-        st.error(f"Error during web research: {str(e)}")
-        return []
+            )
+        ]
+
+
+def fetch_page_bytes(url):
+    """Download at most MAX_PAGE_BYTES of a page, reusing the on-disk copy while it is fresh"""
+    with PAGE_CACHE_LOCK:
+        row = PAGE_CACHE.execute(
+            "SELECT body FROM pages WHERE url = ? AND expires > ?", (url, time.time())
+        ).fetchone()
+    if row:
+        return row[0]
+
+    with SESSION.get(url, timeout=10, stream=True) as page:
+        page.raise_for_status()
+        raw = page.raw.read(MAX_PAGE_BYTES, decode_content=True)
+
+    # Drop expired pages as new ones are stored so the cache file stays bounded
+    with PAGE_CACHE_LOCK:
+        PAGE_CACHE.execute("DELETE FROM pages WHERE expires <= ?", (time.time(),))
+        PAGE_CACHE.execute(
+            "INSERT OR REPLACE INTO pages (url, body, expires) VALUES (?, ?, ?)",
+            (url, raw, time.time() + WEB_CACHE_TTL)
+        )
+    return raw
+
+
+@st.cache_data(ttl=WEB_CACHE_TTL, show_spinner=False)
+def fetch_research_page(url):
+    """Fetch and clean up a single research page (failed fetches raise and are not cached)"""
+    raw = fetch_page_bytes(url)
+    tree = LexborHTMLParser(raw)
+
+    # Clean up page content
+    for node in tree.css('script, style, nav, footer, header, iframe'):
+        node.decompose()
+
+    root = tree.body or tree.root
+    content = root.text(separator='\n', strip=True) if root else ''
+    return content[:1500]  # More conservative length limit
+
+
+def web_research_artwork(artwork_title, artist_name):
+    """Enhanced web research for artwork context (search errors raise, for background use)"""
+    source_urls = search_artwork_sources(artwork_title, artist_name)
+
+    def fetch_page(url):
+        try:
+            return fetch_research_page(url)
+        except Exception:
+            return None
+
+    # Fetch all result pages concurrently; each page is cached on its own
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        pages = list(executor.map(fetch_page, source_urls))
+
+    return [
+        {'source': url, 'content': content}
+        for url, content in zip(source_urls, pages)
+        if content is not None
+    ]
+
+
+def claim_prefetch(future, timeout=10):
+    """Result of a speculative prefetch, or None if it is still queued, failed or timed out"""
+    # A prefetch that never started is cancelled so the click never waits behind other prefetches
+    if future is None or future.cancel():
+        return None
+    try:
+        return future.result(timeout=timeout)
+    except (httpx.HTTPError, FutureTimeoutError):
+        return None
 
 
 def display_artist_selection():
     """Main artist selection interface"""
     st.header("Artwork Context Explorer")
 
-    example_artists = get_random_artists()
+    # Fetch the examples once per session rather than on every keystroke rerun
+    example_artists = st.session_state.example_artists
+    if example_artists is None:
+        example_artists = get_random_artists()
+        # An empty result means the request failed, so leave it unset to retry on the next rerun
+        if example_artists:
+            st.session_state.example_artists = example_artists
     if example_artists:
         st.markdown("**Example artists you could search:**")
         cols = st.columns(3)
@@ -194,11 +324,15 @@ def display_artist_selection():
                             key=f"artist_{artist_id}_{idx}",
                             use_container_width=True
                     ):
+                        # Request the first artworks page alongside the artist details
+                        st.session_state.artworks_future = REQUEST_EXECUTOR.submit(fetch_artist_artworks, artist_id, 1)
                         full_details = get_artist_details(artist_id)
                         st.session_state.selected_artist = full_details
                         st.session_state.artworks_list = []
                         st.session_state.artworks_current_page = 1
                         st.session_state.has_more_artworks = True
+                        st.session_state.next_page_future = None
+                        st.session_state.detail_futures = {}
                         st.rerun()
         else:
             st.warning("No artists found matching your query.")
@@ -215,21 +349,54 @@ def display_artwork_analysis():
 
     # Initial load of first page
     if not st.session_state.artworks_list and st.session_state.has_more_artworks:
-        response = get_artist_artworks(artist_id, st.session_state.artworks_current_page)
+        if st.session_state.artworks_future is None:
+            st.session_state.artworks_future = REQUEST_EXECUTOR.submit(
+                fetch_artist_artworks, artist_id, st.session_state.artworks_current_page
+            )
+        future = st.session_state.artworks_future
+
+        # Paint placeholder cards right away instead of blocking on the API
+        if not future.done():
+            placeholder = st.empty()
+            with placeholder.container():
+                cols = st.columns(3)
+                for idx in range(ARTWORKS_PER_PAGE):
+                    with cols[idx % 3]:
+                        st.caption("Loading artwork...")
+            with st.spinner("Loading artworks..."):
+                wait([future])
+            placeholder.empty()
+
+        st.session_state.artworks_future = None
+        try:
+            response = future.result()
+        except httpx.HTTPError as e:
+            # Leave has_more_artworks set so the next rerun retries the request
+            st.error(f"Error fetching artist artworks: {str(e)}")
+            st.button("Retry", use_container_width=True)
+            return
         st.session_state.artworks_list = response.get('artworks', [])
         pagination = response.get('pagination', {})
         st.session_state.has_more_artworks = pagination.get('current_page', 1) < pagination.get('total_pages', 1)
 
     # Display artworks
     if st.session_state.artworks_list:
+        # Speculatively fetch details for every visible artwork so View Details is instant
+        for artwork in st.session_state.artworks_list:
+            artwork_id = artwork.get('id')
+            if artwork_id is not None and artwork_id not in st.session_state.detail_futures:
+                st.session_state.detail_futures[artwork_id] = EXECUTOR.submit(fetch_artwork_details, artwork_id)
+
         cols = st.columns(3)
         for idx, artwork in enumerate(st.session_state.artworks_list):
             with cols[idx % 3]:
                 image_id = artwork.get('image_id')
-                st.image(
-                    f"https://www.artic.edu/iiif/2/{image_id}/full/300,/0/default.jpg" if image_id else PLACEHOLDER_IMAGE,
-                    use_container_width=True,
-                    caption=artwork.get('title', 'Untitled')
+                image_url = f"https://www.artic.edu/iiif/2/{image_id}/full/300,/0/default.jpg" if image_id else PLACEHOLDER_IMAGE
+                # Let the browser load thumbnails lazily and in parallel
+                st.markdown(
+                    f'<figure><img src="{image_url}" loading="lazy" decoding="async" style="width:100%"/>'
+                    f'<figcaption>{html.escape(artwork.get("title") or "Untitled")}</figcaption></figure>',
+                    unsafe_allow_html=True
                 )
 
                 if st.button(
@@ -238,29 +405,64 @@ def display_artwork_analysis():
                         help="Click to view details",
                         use_container_width=True
                 ):
-                    st.session_state.selected_artwork = get_artwork_details(artwork.get('id', ''))
-                    st.session_state.web_context = web_research_artwork(
-                        st.session_state.selected_artwork['title'],
+                    # Web research only needs the titles, so run it alongside the details lookup
+                    research_future = REQUEST_EXECUTOR.submit(
+                        web_research_artwork,
+                        artwork.get('title') or 'Untitled',
                         st.session_state.selected_artist['title']
                     )
-                    st.rerun()
+                    # Each prefetch is consumed once, so a failed one is never reused
+                    future = st.session_state.detail_futures.pop(artwork.get('id'), None)
+                    details = claim_prefetch(future)
+                    if not details:
+                        details = get_artwork_details(artwork.get('id', ''))
+
+                    # Stay on the grid with the error visible if the details are still missing
+                    if details:
+                        st.session_state.selected_artwork = details
+                        try:
+                            st.session_state.web_context = research_future.result()
+                            st.session_state.research_error = None
+                        except Exception as e:
+                            st.session_state.web_context = []
+                            st.session_state.research_error = f"Error during web research: {str(e)}"
+                        st.rerun()
 
         # Load More button
         if st.session_state.has_more_artworks:
+            # Prefetch the next page in the background while the user browses
+            if st.session_state.next_page_future is None:
+                st.session_state.next_page_future = EXECUTOR.submit(
+                    fetch_artist_artworks, artist_id, st.session_state.artworks_current_page + 1
+                )
+
             if st.button("Load More Artworks", use_container_width=True):
-                st.session_state.artworks_current_page += 1
-                response = get_artist_artworks(artist_id, st.session_state.artworks_current_page)
-                new_artworks = response.get('artworks', [])
-
-                if new_artworks:
-                    st.session_state.artworks_list.extend(new_artworks)
-                    pagination = response.get('pagination', {})
-                    st.session_state.has_more_artworks = pagination.get('current_page', 1) < pagination.get(
-                        'total_pages', 1)
-                else:
-                    st.session_state.has_more_artworks = False
-
-                st.rerun()
+                next_page = st.session_state.artworks_current_page + 1
+                response = claim_prefetch(st.session_state.next_page_future)
+                st.session_state.next_page_future = None
+
+                # A missing or empty prefetch is confirmed with a direct request before giving up on paging
+                if not response or not response.get('artworks'):
+                    try:
+                        response = fetch_artist_artworks(artist_id, next_page)
+                    except httpx.HTTPError as e:
+                        response = None
+                        st.error(f"Error fetching artist artworks: {str(e)}")
+
+                # On failure keep the current page so clicking again retries
+                if response is not None:
+                    st.session_state.artworks_current_page = next_page
+                    new_artworks = response.get('artworks', [])
+
+                    if new_artworks:
+                        st.session_state.artworks_list.extend(new_artworks)
+                        pagination = response.get('pagination', {})
+                        st.session_state.has_more_artworks = pagination.get('current_page', 1) < pagination.get(
+                            'total_pages', 1)
+                    else:
+                        st.session_state.has_more_artworks = False
+
+                    st.rerun()
     else:
         st.warning("No artworks found for this artist.")
 
@@ -298,6 +500,9 @@ def display_analysis_panel():
                 **Artist Lifespan:** {artist.get('birth_date', '?')} - {artist.get('death_date', '?')}  
                 """)
 
+    if st.session_state.research_error:
+        st.error(st.session_state.research_error)
+
     # Display web research context if available
     if st.session_state.web_context:
         st.divider()
@@ -316,9 +521,13 @@ def main():
             st.session_state.selected_artist = None
             st.session_state.selected_artwork = None
             st.session_state.web_context = []
+            st.session_state.research_error = None
             st.session_state.artworks_list = []
             st.session_state.artworks_current_page = 1
             st.session_state.has_more_artworks = True
+            st.session_state.artworks_future = None
+            st.session_state.next_page_future = None
+            st.session_state.detail_futures = {}
             st.rerun()
 
         st.markdown("---")